@@ -1,12 +1,27 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import re
 import json
 import os
+import time
+import math
+import heapq
+import difflib
+import threading
+from bisect import bisect_left
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import accumulate
 import plotly.express as px
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 from groq import Groq
+from search_bundle import (
+    DATA_CSV, TOKEN_PATTERN, catalog_frame, get_course_advice, get_course_difficulty, open_bundle, tfidf_scores,
+)
+try:
+    from st_keyup import st_keyup
+except ImportError:  # tanpa streamlit-keyup, saran autocomplete baru muncul setelah Enter
+    st_keyup = None
 
 # ==========================================
 # 1. KONFIGURASI & CSS
@@ -62,15 +77,18 @@ def create_interest_map(results):
     """
     Membuat peta minat interaktif (Bubble Chart) berdasarkan hasil analisis.
     """
-    if not results:
+    if len(results) == 0:
         st.info("Tidak ada hasil yang tersedia untuk visualisasi.")
         return
 
-    df = pd.DataFrame(results)
-    df['Similarity Score'] = pd.to_numeric(df['Similarity Score'], errors='coerce')
-    df['Difficulty'] = pd.to_numeric(df['Difficulty'], errors='coerce')
-    df.dropna(subset=['Similarity Score', 'Difficulty'], inplace=True)
-    df['Cluster'] = df['Program'].apply(lambda x: str(x).split()[0] if isinstance(x, str) else 'Lain-lain')
+    # results boleh DataFrame hasil pencarian atau list dict (bookmark); assign() tidak mengubah aslinya
+    df = pd.DataFrame(results).assign(
+        **{
+            'Similarity Score': lambda d: pd.to_numeric(d['Similarity Score'], errors='coerce'),
+            'Difficulty': lambda d: pd.to_numeric(d['Difficulty'], errors='coerce'),
+        }
+    ).dropna(subset=['Similarity Score', 'Difficulty'])
+    df = df.assign(Cluster=df['Program'].apply(lambda x: str(x).split()[0] if isinstance(x, str) else 'Lain-lain'))
     
     fig = px.scatter(
         df, 
@@ -108,6 +126,12 @@ if "compare_list" not in st.session_state:
     st.session_state.compare_list = []
 if "ai_compare_request" not in st.session_state:
     st.session_state.ai_compare_request = False
+if "prefetch_enabled" not in st.session_state:
+    st.session_state.prefetch_enabled = False
+if "prefetched_compare" not in st.session_state:
+    st.session_state.prefetched_compare = {}
+if "prefetch_tokens" not in st.session_state:
+    st.session_state.prefetch_tokens = 0
 # --- INISIALISASI STATE FITUR #3 (SIMULASI DAMPAK) ---
 if "impact_course" not in st.session_state:
     st.session_state.impact_course = None
@@ -116,6 +140,8 @@ if "impact_result" not in st.session_state:
 # --- INISIALISASI STATE FITUR #4 (ANALISIS JALUR) ---
 if "path_query" not in st.session_state:
     st.session_state.path_query = None
+if "path_suggestions" not in st.session_state:
+    st.session_state.path_suggestions = ""
 if "path_analysis" not in st.session_state:
     st.session_state.path_analysis = None
 # ----------------------------------------------------
@@ -157,24 +183,180 @@ def save_bookmarks_to_file(bookmarks):
 if not st.session_state.bookmarks:
     st.session_state.bookmarks = load_bookmarks_from_file()
 
-@st.cache_data
+@st.cache_resource
+def get_search_bundle():
+    """Artefak pencarian prebuilt (memory-mapped, dibagi antar proses di host yang sama).
+
+    Dibangun ulang hanya jika belum ada atau checksum CSV sumbernya sudah berubah;
+    normalnya dibuat offline lewat `python search_bundle.py` saat deploy.
+    """
+    return open_bundle()
+
+@st.cache_resource
 def load_data():
+    """Katalog mata kuliah, dibagi oleh semua sesi dalam satu proses.
+
+    DataFrame ini read-only: jangan di-copy atau diubah di jalur pencarian, pakai mask/posisi baris.
+    Urutan barisnya sama dengan baris matriks TF-IDF di bundle; kolom `Difficulty` dan `Advice`
+    sudah dihitung saat build. Kolom numerik dan kategorikal menunjuk ke memory-map bersama,
+    kolom teks (`Course`, `combined_features`) milik proses ini.
+    """
     try:
-        # PENTING: Pastikan nama file CSV ini benar
-        df = pd.read_csv('List Mata Kuliah UBM.xlsx - Sheet1.csv')
-        df = df.dropna(subset=['Course']) 
-        df['combined_features'] = df['Course'].astype(str) + ' ' + df['Program'].astype(str)
+        # PENTING: Pastikan nama file CSV (DATA_CSV) ini benar
+        df = catalog_frame(get_search_bundle())
+        df['features_lower'] = df['combined_features'].str.lower()
         return df
     except FileNotFoundError:
-        st.error("File data 'List Mata Kuliah UBM.xlsx - Sheet1.csv' tidak ditemukan. Pastikan sudah ada.")
+        st.error(f"File data '{DATA_CSV}' tidak ditemukan. Pastikan sudah ada.")
         return pd.DataFrame()
 
+# --- ROUTING MODEL AI PER TUGAS ---
+# Setiap tugas punya daftar model (utama -> cadangan) dan batas latensi total tugas (detik).
+# Ekstraksi kata kunci cukup pakai model kecil & cepat karena ada di jalur kritis pencarian.
+MODEL_ROUTES = {
+    "keywords": {"models": ["llama-3.1-8b-instant"], "budget": 2.0},
+    "compare": {"models": ["llama-3.3-70b-versatile", "llama-3.1-8b-instant"], "budget": 12.0},
+    "impact": {"models": ["llama-3.3-70b-versatile", "llama-3.1-8b-instant"], "budget": 15.0},
+    "path": {"models": ["llama-3.3-70b-versatile", "llama-3.1-8b-instant"], "budget": 15.0},
+    "chat": {"models": ["llama-3.3-70b-versatile", "llama-3.1-8b-instant"], "budget": 10.0},
+}
+LOCAL_MODEL = "lokal (non-LLM)"
+
+@st.cache_resource
+def get_ai_metrics():
+    """Penampung metrik latensi & keberhasilan per tugas/model, dibagi oleh semua sesi."""
+    return {"lock": threading.Lock(), "routes": {}}
+
+def record_ai_metric(task, model, latency, ok):
+    metrics = get_ai_metrics()
+    with metrics["lock"]:
+        entry = metrics["routes"].setdefault((task, model), {"attempts": 0, "success": 0, "latencies": deque(maxlen=200)})
+        entry["attempts"] += 1
+        entry["success"] += int(ok)
+        entry["latencies"].append(latency)
+
+def summarize_ai_metrics():
+    """Ringkasan metrik routing AI dalam bentuk DataFrame (untuk ditampilkan di sidebar)."""
+    metrics = get_ai_metrics()
+    rows = []
+    with metrics["lock"]:
+        for (task, model), entry in sorted(metrics["routes"].items()):
+            lat = pd.Series(list(entry["latencies"])) * 1000
+            rows.append({
+                'Tugas': task,
+                'Model': model,
+                'Percobaan': entry["attempts"],
+                'Sukses %': round(100 * entry["success"] / entry["attempts"], 1),
+                'p50 (ms)': round(lat.quantile(0.5)),
+                'p95 (ms)': round(lat.quantile(0.95)),
+            })
+    return pd.DataFrame(rows)
+
+def run_ai_task(task, messages, temperature, max_tokens, local_fallback=None, stream=False):
+    """Menjalankan satu tugas AI sesuai MODEL_ROUTES.
+
+    `budget` adalah deadline untuk seluruh tugas: model dicoba berurutan dan tiap percobaan hanya
+    mendapat sisa waktu sampai deadline. Jika semua model gagal atau budget habis, `local_fallback()`
+    dipakai (kalau ada), selain itu error terakhir dilempar. Untuk `stream=True` yang dikembalikan
+    adalah objek stream dan deadline berlaku sampai stream terbuka (token pertama).
+    """
+    route = MODEL_ROUTES[task]
+    client = Groq(api_key=st.secrets["GROQ_API_KEY"], max_retries=0)
+    deadline = time.perf_counter() + route["budget"]
+    last_error = None
+    for model in route["models"]:
+        start = time.perf_counter()
+        if start >= deadline:
+            break
+        try:
+            completion = client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=stream,
+                timeout=deadline - start,
+            )
+            result = completion if stream else completion.choices[0].message.content
+            record_ai_metric(task, model, time.perf_counter() - start, ok=True)
+            return result
+        except Exception as e:
+            record_ai_metric(task, model, time.perf_counter() - start, ok=False)
+            last_error = e
+    if local_fallback is not None:
+        start = time.perf_counter()
+        result = local_fallback()
+        record_ai_metric(task, LOCAL_MODEL, time.perf_counter() - start, ok=True)
+        return result
+    raise last_error or TimeoutError(f"Budget {route['budget']} detik untuk tugas '{task}' habis.")
+
+# --- RENDER STREAMING AI (THROTTLED) ---
+STREAM_FLUSH_SECONDS = 0.15
+STREAM_FLUSH_CHARS = 400
+
+@st.cache_resource
+def get_stream_metrics():
+    """Statistik render streaming terakhir (dibagi semua sesi)."""
+    return {"lock": threading.Lock(), "streams": deque(maxlen=200)}
+
+def iter_completion_text(completion):
+    """Potongan teks dari stream chat completion Groq."""
+    for chunk in completion:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+def render_stream(placeholder, chunks, flush_seconds=STREAM_FLUSH_SECONDS, flush_chars=STREAM_FLUSH_CHARS):
+    """Menampilkan potongan teks streaming ke `placeholder` dengan throttling.
+
+    Potongan dikumpulkan dan baru di-flush (teks polos + kursor) tiap `flush_seconds` detik atau
+    setelah `flush_chars` karakter baru, sehingga jumlah re-render tidak ikut panjang jawaban.
+    Markdown penuh hanya di-render sekali di akhir. Mengembalikan (teks lengkap, statistik).
+    """
+    parts = []
+    n_chunks = flushes = pending = 0
+    render_time = 0.0
+    start = last_flush = time.perf_counter()
+    for chunk in chunks:
+        parts.append(chunk)
+        n_chunks += 1
+        pending += len(chunk)
+        now = time.perf_counter()
+        if now - last_flush >= flush_seconds or pending >= flush_chars:
+            placeholder.text("".join(parts) + "▌")
+            last_flush = time.perf_counter()
+            render_time += last_flush - now
+            flushes += 1
+            pending = 0
+
+    full_text = "".join(parts)
+    render_start = time.perf_counter()
+    placeholder.markdown(full_text)
+    end = time.perf_counter()
+    render_time += end - render_start
+
+    stats = {
+        "chunks": n_chunks,
+        "flushes": flushes + 1,
+        "chunk_rate": n_chunks / max(end - start, 1e-9),
+        "render_ms": render_time * 1000,
+    }
+    metrics = get_stream_metrics()
+    with metrics["lock"]:
+        metrics["streams"].append(stats)
+    return full_text, stats
+
 # --- FUNGSI AI UNTUK TRANSLASI MINAT ---
+def get_keywords_locally(user_query):
+    """Cadangan non-LLM: cocokkan kata user secara fuzzy ke kunci KEYWORD_MAPPING."""
+    keywords = []
+    for word in re.findall(r'\w+', user_query.lower()):
+        for key in difflib.get_close_matches(word, KEYWORD_MAPPING.keys(), n=1, cutoff=0.75):
+            keywords.append(KEYWORD_MAPPING[key])
+    return ' '.join(keywords) if keywords else user_query
+
 def get_keywords_via_ai(user_query):
     try:
         if "GROQ_API_KEY" in st.secrets:
-            client = Groq(api_key=st.secrets["GROQ_API_KEY"])
-            
             prompt = f"""
             Tugas: Ubah input user yang santai menjadi kata kunci akademis/jurusan kuliah.
             Input User: "{user_query}"
@@ -185,16 +367,16 @@ def get_keywords_via_ai(user_query):
             Output HANYA kata kuncinya saja (dipisah spasi). Jangan ada kata pengantar.
             """
             
-            completion = client.chat.completions.create(
-                model="llama-3.3-70b-versatile",
-                messages=[{"role": "user", "content": prompt}],
+            return run_ai_task(
+                "keywords",
+                [{"role": "user", "content": prompt}],
                 temperature=0.3,
                 max_tokens=50,
+                local_fallback=lambda: get_keywords_locally(user_query),
             )
-            return completion.choices[0].message.content
     except:
-        return user_query
-    return user_query
+        return get_keywords_locally(user_query)
+    return get_keywords_locally(user_query)
 
 # --- Helpers Lain ---
 KEYWORD_MAPPING = {
@@ -206,26 +388,6 @@ KEYWORD_MAPPING = {
     "masak": "food beverage tata boga kitchen pastry kuliner makanan minuman chef", 
 }
 
-def get_course_advice(course_name):
-    course_lower = course_name.lower()
-    if any(x in course_lower for x in ['matematika', 'statistik', 'akuntansi']):
-        return "💡 Tips: Pahami konsep dasar, jangan cuma hafal rumus. Latihan soal kuncinya!"
-    elif any(x in course_lower for x in ['coding', 'algoritma', 'data']):
-        return "💻 Tips: Praktek (ngoding) lebih efektif daripada baca teori. Jangan takut error!"
-    elif any(x in course_lower for x in ['desain', 'gambar', 'art']):
-        return "🎨 Tips: Perbanyak lihat referensi (Pinterest) dan bangun portofolio."
-    elif any(x in course_lower for x in ['bisnis', 'manajemen']):
-        return "📊 Tips: Pelajari studi kasus nyata perusahaan dan latih skill presentasi."
-    else:
-        return "📝 Tips: Catat poin penting dosen dan aktif bertanya di kelas."
-
-def get_course_difficulty(course_name):
-    name = (course_name or "").lower()
-    if any(k in name for k in ['matematika', 'kalkulus', 'statistika', 'fisika']): return 5
-    elif any(k in name for k in ['algoritma', 'program', 'akuntansi']): return 4
-    elif any(k in name for k in ['desain', 'bahasa', 'komunikasi']): return 2
-    return 3
-
 def expand_query(user_query):
     expanded = user_query.lower()
     for key, val in KEYWORD_MAPPING.items():
@@ -244,24 +406,204 @@ def process_negation(user_input):
                 cleaned_text = cleaned_text.replace(match.group(0), '')
     return cleaned_text, words_to_remove
 
-def get_recommendations(user_query, df, words_to_remove=None):
+# --- BM25 (INVERTED INDEX + PRUNING MAXSCORE) ---
+BM25_FIELD_WEIGHTS = {'Course': 2.0, 'Program': 1.0}
+RANKING_METHODS = {"TF-IDF": "tfidf", "BM25": "bm25"}
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(str(text).lower())
+
+@st.cache_resource
+def get_bm25_index(field_weights=None, k1=1.2, b=0.75):
+    """Membangun inverted index BM25 atas katalog dari load_data().
+
+    Tanpa `field_weights` index dibangun dari `combined_features`; dengan `field_weights`
+    (mis. BM25_FIELD_WEIGHTS) tiap kolom diberi bobot sendiri (BM25F). Skor per posting
+    sudah dihitung di sini sehingga query cukup menjumlahkan dan memangkas.
+    """
+    df = load_data()
+    fields = field_weights or {'combined_features': 1.0}
+    doc_tfs, doc_lens = [], []
+    for values in zip(*(df[field].astype(str) for field in fields)):
+        tf = {}
+        for weight, text in zip(fields.values(), values):
+            for token in tokenize(text):
+                tf[token] = tf.get(token, 0.0) + weight
+        doc_tfs.append(tf)
+        doc_lens.append(sum(tf.values()))
+
+    n_docs = len(doc_tfs)
+    avg_len = sum(doc_lens) / n_docs if n_docs else 0.0
+    doc_freq = Counter(term for tf in doc_tfs for term in tf)
+    idf = {term: math.log(1 + (n_docs - n + 0.5) / (n + 0.5)) for term, n in doc_freq.items()}
+
+    # postings[term] = (daftar posisi dokumen terurut, daftar skor BM25 term di dokumen tsb)
+    postings = {}
+    for doc, (tf, length) in enumerate(zip(doc_tfs, doc_lens)):
+        norm = k1 * (1 - b + b * length / avg_len)
+        for term, freq in tf.items():
+            docs, scores = postings.setdefault(term, ([], []))
+            docs.append(doc)
+            scores.append(idf[term] * freq * (k1 + 1) / (freq + norm))
+
+    return {
+        'postings': postings,
+        'max_scores': {term: max(scores) for term, (_, scores) in postings.items()},
+    }
+
+def bm25_top_k(index, query, k=5, allowed=None, min_ratio=0.10):
+    """Top-k BM25 dengan pruning MaxScore, biayanya mengikuti jumlah postings yang cocok.
+
+    `allowed` adalah mask boolean per posisi dokumen (hasil filter). Dokumen dengan skor
+    <= `min_ratio` x batas atas skor query tidak pernah masuk hasil, sama seperti ambang 10%
+    di jalur TF-IDF. Mengembalikan list (posisi dokumen, skor relatif 0-1) terurut menurun.
+    """
+    postings, max_scores = index['postings'], index['max_scores']
+    terms = sorted({t for t in tokenize(query) if t in postings}, key=max_scores.get)
+    if not terms:
+        return []
+    lists = [postings[t] for t in terms]
+    upper = list(accumulate(max_scores[t] for t in terms))  # upper[i] = batas atas term 0..i
+    query_upper = upper[-1]
+    threshold = min_ratio * query_upper
+    cursors = [0] * len(terms)
+    heap = []
+
+    # term [essential:] wajib dijelajahi; term di bawahnya hanya dicek untuk kandidat yang masih mungkin menang
+    essential = 0
+    while essential < len(terms) and upper[essential] <= threshold:
+        essential += 1
+
+    while essential < len(terms):
+        heads = [lists[i][0][cursors[i]] for i in range(essential, len(terms)) if cursors[i] < len(lists[i][0])]
+        if not heads:
+            break
+        doc = min(heads)
+        score = 0.0
+        for i in range(essential, len(terms)):
+            docs, scores = lists[i]
+            if cursors[i] < len(docs) and docs[cursors[i]] == doc:
+                score += scores[cursors[i]]
+                cursors[i] += 1
+        if allowed is not None and not allowed[doc]:
+            continue
+        for i in range(essential - 1, -1, -1):
+            if score + upper[i] <= threshold:
+                break
+            docs, scores = lists[i]
+            cursors[i] = bisect_left(docs, doc, cursors[i])
+            if cursors[i] < len(docs) and docs[cursors[i]] == doc:
+                score += scores[cursors[i]]
+        if score > threshold:
+            heapq.heappush(heap, (score, -doc))
+            if len(heap) > k:
+                heapq.heappop(heap)
+            if len(heap) == k:
+                threshold = max(threshold, heap[0][0])
+                while essential < len(terms) and upper[essential] <= threshold:
+                    essential += 1
+
+    return [(-neg_doc, score / query_upper) for score, neg_doc in sorted(heap, reverse=True)]
+
+def get_recommendations(user_query, df, words_to_remove=None, method="tfidf", field_weights=None, candidates=None):
+    """Top-5 mata kuliah untuk query.
+
+    `df` adalah katalog bersama dari load_data() dan tidak pernah disalin: filter jurusan
+    (`candidates`, mask boolean per baris) dan negasi digabung jadi satu mask, lalu hanya
+    baris hasil yang dibentuk di akhir. `method="tfidf"` memakai matriks TF-IDF prebuilt dari
+    bundle (idf dihitung atas seluruh katalog); `method="bm25"` memakai inverted index katalog
+    dengan `field_weights` opsional. Perkiraan ukuran array kerja utama (mask, skor, indeks) dan
+    baris hasil dicatat di `attrs['working_bytes_estimate']`; ini bukan puncak memori, karena
+    array sementara di dalam scoring, filter negasi dan heap BM25 tidak ikut dihitung.
+    """
     if df.empty or not user_query.strip(): return pd.DataFrame()
-    df_filtered = df.copy()
+    mask = np.ones(len(df), dtype=bool) if candidates is None else np.asarray(candidates, dtype=bool)
     if words_to_remove:
+        mask = mask.copy()
         for word in words_to_remove:
-            df_filtered = df_filtered[~df_filtered['combined_features'].str.lower().str.contains(word, na=False)]
-    if df_filtered.empty: return pd.DataFrame()
+            mask &= ~df['features_lower'].str.contains(word, na=False).to_numpy()
+    if not mask.any(): return pd.DataFrame()
     
     expanded_query = expand_query(user_query)
-    vectorizer = TfidfVectorizer()
-    try:
-        tfidf_matrix = vectorizer.fit_transform(df_filtered['combined_features'])
-        query_vec = vectorizer.transform([expanded_query])
-        scores = cosine_similarity(query_vec, tfidf_matrix).flatten()
-        df_filtered['Similarity Score'] = (scores * 100).round(1)
-        return df_filtered[df_filtered['Similarity Score'] > 10.0].sort_values('Similarity Score', ascending=False).head(5)
-    except:
-        return pd.DataFrame()
+    if method == "bm25":
+        hits = bm25_top_k(get_bm25_index(field_weights), expanded_query, k=5, allowed=mask)
+        top = np.array([doc for doc, _ in hits], dtype=int)
+        top_scores = [round(ratio * 100, 1) for _, ratio in hits]
+        work_arrays = [mask, top]
+    else:
+        scores = (tfidf_scores(get_search_bundle(), expanded_query) * 100).round(1)
+        keep = np.flatnonzero(mask & (scores > 10.0))
+        top = keep[np.argsort(-scores[keep], kind='stable')[:5]]
+        top_scores = scores[top]
+        work_arrays = [mask, scores, keep]
+    if len(top) == 0: return pd.DataFrame()
+    result = df.iloc[top].assign(**{'Similarity Score': top_scores})
+    result.attrs['working_bytes_estimate'] = int(sum(a.nbytes for a in work_arrays) + result.memory_usage(deep=True).sum())
+    return result
+
+# --- AUTOCOMPLETE (PREFIX INDEX) ---
+AUTOCOMPLETE_DEBOUNCE_MS = 250
+AUTOCOMPLETE_KINDS = {'Matkul': 0, 'Jurusan': 1, 'Minat': 2}
+
+@st.cache_resource
+def get_autocomplete_index():
+    """Sorted-array prefix index atas nama matkul, nama jurusan dan kunci KEYWORD_MAPPING.
+
+    Setiap nama disimpan sekali per awal kata ("prinsip akuntansi", "akuntansi") supaya ketikan
+    yang cocok dengan kata mana pun tetap ketemu. Mengembalikan (keys terurut, entries sejajar).
+    """
+    df = load_data()
+    names = []
+    if not df.empty:
+        names += [(name, 'Matkul') for name in df['Course'].astype(str).unique()]
+        names += [(name, 'Jurusan') for name in df['Program'].astype(str).unique()]
+    names += [(name, 'Minat') for name in KEYWORD_MAPPING]
+
+    rows = []
+    for name, kind in names:
+        lower = name.lower()
+        for word_pos, match in enumerate(re.finditer(r'\w', lower)):
+            start = match.start()
+            if start == 0 or not lower[start - 1].isalnum():
+                rows.append((lower[start:], word_pos, AUTOCOMPLETE_KINDS[kind], name, kind))
+    rows.sort()
+    return [r[0] for r in rows], [r[1:] for r in rows]
+
+def autocomplete(index, prefix, limit=8):
+    """Saran (nama, jenis) yang diawali `prefix`; cocok di awal nama diurutkan lebih dulu."""
+    prefix = prefix.strip().lower()
+    if len(prefix) < 2:
+        return []
+    keys, entries = index
+    lo = bisect_left(keys, prefix)
+    hi = bisect_left(keys, prefix + '\uffff', lo)
+    suggestions, seen = [], set()
+    for word_pos, kind_order, name, kind in sorted(entries[lo:hi], key=lambda e: (e[0] > 0, e[1], e[2])):
+        if name not in seen:
+            seen.add(name)
+            suggestions.append((name, kind))
+            if len(suggestions) == limit:
+                break
+    return suggestions
+
+def use_suggestion(target_key, text):
+    current = (st.session_state.get(target_key) or "").strip()
+    st.session_state[target_key] = f"{current} {text}".strip()
+
+def render_autocomplete(label, target_key, widget_key, placeholder=""):
+    """Input as-you-type (dengan debounce) + tombol saran; saran yang dipilih ditambahkan ke state `target_key`.
+
+    Mengetik hanya me-rerun script untuk lookup prefix index, tidak pernah menjalankan scoring TF-IDF.
+    """
+    if st_keyup is not None:
+        prefix = st_keyup(label, key=widget_key, debounce=AUTOCOMPLETE_DEBOUNCE_MS, placeholder=placeholder)
+    else:
+        prefix = st.text_input(label, key=widget_key, placeholder=placeholder)
+    suggestions = autocomplete(get_autocomplete_index(), prefix or "")
+    if suggestions:
+        cols = st.columns(min(len(suggestions), 4))
+        for j, (name, kind) in enumerate(suggestions):
+            cols[j % len(cols)].button(name, key=f"{widget_key}_suggest_{j}", help=kind, on_click=use_suggestion, args=(target_key, name))
 
 # --- FUNGSI CALLBACK & LOGIKA FITUR #1, #2, #3, dan #4 ---
 
@@ -336,32 +678,123 @@ def toggle_compare(course):
             except:
                 pass
 
+def summarize_comparison_locally(data):
+    """Ringkasan perbandingan tanpa LLM, dipakai saat semua model AI gagal/terlambat."""
+    scores = pd.to_numeric(pd.Series([d.get('Similarity Score') for d in data]), errors='coerce').fillna(0)
+    best = data[int(scores.idxmax())]
+    easiest = min(data, key=lambda d: int(d.get('Difficulty', 3)))
+    best_score = best.get('Similarity Score')
+    best_score = f"{best_score}%" if pd.notna(best_score) else "-"
+    return (
+        f"⚡ Ringkasan cepat (tanpa AI): **{best['Course']}** paling cocok dengan minatmu "
+        f"({best_score}), sedangkan **{easiest['Course']}** paling ringan "
+        f"(kesulitan {easiest.get('Difficulty', 3)}/5)."
+    )
+
+def build_comparison_messages(data):
+    summary = "\n".join([f"- {d['Course']} ({d['Program']}, Kecocokan {d['Similarity Score']}%, Kesulitan {d['Difficulty']}/5). Tips: {d['Advice']}" for d in data])
+    
+    prompt = f"""
+    Tugas: Analisis secara singkat (maksimal 3 paragraf) data mata kuliah berikut:
+    {summary}
+
+    Berikan saran final yang gaul dan dukung pengguna untuk memilih berdasarkan data di atas. Gunakan bahasa Indonesia santai dan emoji.
+    """
+    return [{"role": "user", "content": prompt}]
+
 def analyze_comparison_with_ai(data):
     """Meminta Groq menganalisis perbandingan data."""
     try:
         if "GROQ_API_KEY" in st.secrets:
-            client = Groq(api_key=st.secrets["GROQ_API_KEY"])
-            
-            summary = "\n".join([f"- {d['Course']} ({d['Program']}, Kecocokan {d['Similarity Score']}%, Kesulitan {d['Difficulty']}/5). Tips: {d['Advice']}" for d in data])
-            
-            prompt = f"""
-            Tugas: Analisis secara singkat (maksimal 3 paragraf) data mata kuliah berikut:
-            {summary}
-
-            Berikan saran final yang gaul dan dukung pengguna untuk memilih berdasarkan data di atas. Gunakan bahasa Indonesia santai dan emoji.
-            """
-            
-            completion = client.chat.completions.create(
-                model="llama-3.3-70b-versatile",
-                messages=[{"role": "user", "content": prompt}],
+            return run_ai_task(
+                "compare",
+                build_comparison_messages(data),
                 temperature=0.5,
-                max_tokens=512,
+                max_tokens=COMPARE_MAX_TOKENS,
+                local_fallback=lambda: summarize_comparison_locally(data),
             )
-            return completion.choices[0].message.content
     except Exception as e:
         return f"Gagal mendapatkan insight AI. Error: {str(e)}"
     return "Tidak ada Insight AI."
 
+# --- PREFETCH SPEKULATIF INSIGHT PERBANDINGAN ---
+COMPARE_MAX_TOKENS = 512
+PREFETCH_TOKEN_BUDGET = 2048  # batas token spekulatif per sesi, dihitung dari max_tokens tiap prefetch
+
+@st.cache_resource
+def get_prefetch_executor():
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="ai-prefetch")
+
+@st.cache_resource
+def get_prefetch_metrics():
+    """Counter prefetch (dibagi semua sesi): dimulai, dipakai (hit), klik sesi prefetch tanpa hasil siap pakai (miss), token."""
+    return {"lock": threading.Lock(), "started": 0, "hits": 0, "misses": 0, "skipped": 0, "tokens": 0}
+
+def record_prefetch_metric(**deltas):
+    metrics = get_prefetch_metrics()
+    with metrics["lock"]:
+        for name, delta in deltas.items():
+            metrics[name] += delta
+
+def comparison_key(data):
+    return tuple(sorted(d['Course'] for d in data))
+
+def prefetch_comparison(data):
+    """Memulai analisis perbandingan di background saat mode prefetch aktif dan ada >= 2 matkul.
+
+    Future-nya disimpan per kombinasi matkul di st.session_state.prefetched_compare. Prefetch
+    hanya memanggil LLM tanpa fallback lokal, jadi kegagalan/timeout tersimpan sebagai exception
+    di Future dan tidak pernah ditampilkan. Kombinasi yang prefetch-nya sudah dipakai atau melebihi
+    PREFETCH_TOKEN_BUDGET dicatat sebagai None supaya tidak di-prefetch ulang tiap rerun.
+    """
+    if not st.session_state.prefetch_enabled or len(data) < 2:
+        return
+    key = comparison_key(data)
+    if key in st.session_state.prefetched_compare:
+        return
+    try:
+        has_key = "GROQ_API_KEY" in st.secrets
+    except Exception:
+        has_key = False
+    if not has_key:
+        return
+    if st.session_state.prefetch_tokens + COMPARE_MAX_TOKENS > PREFETCH_TOKEN_BUDGET:
+        st.session_state.prefetched_compare[key] = None
+        record_prefetch_metric(skipped=1)
+        return
+    st.session_state.prefetch_tokens += COMPARE_MAX_TOKENS
+    st.session_state.prefetched_compare[key] = get_prefetch_executor().submit(
+        run_ai_task, "compare", build_comparison_messages(data), temperature=0.5, max_tokens=COMPARE_MAX_TOKENS,
+    )
+    record_prefetch_metric(started=1, tokens=COMPARE_MAX_TOKENS)
+
+def get_comparison_insight(data):
+    """Ambil insight dari prefetch (menunggu bila masih berjalan), selain itu panggil AI langsung.
+
+    Hasil prefetch hanya dipakai sekali: klik berikutnya untuk kombinasi yang sama memanggil AI lagi.
+    Hit dihitung hanya bila prefetch berhasil; prefetch yang gagal dibuang dan dihitung miss.
+    Prefetch yang masih antre di executor (tertahan prefetch sesi lain) dibatalkan dan diganti
+    panggilan langsung, supaya klik tidak lebih lambat daripada tanpa prefetch.
+    """
+    key = comparison_key(data)
+    future = st.session_state.prefetched_compare.get(key)
+    st.session_state.prefetched_compare[key] = None
+    if future is not None and future.cancel():
+        st.session_state.prefetch_tokens -= COMPARE_MAX_TOKENS
+        record_prefetch_metric(tokens=-COMPARE_MAX_TOKENS)
+    elif future is not None:
+        try:
+            result = future.result()
+        except Exception:
+            pass
+        else:
+            record_prefetch_metric(hits=1)
+            return result
+    # sesi yang tidak mengaktifkan prefetch tidak ikut dihitung supaya hit rate hanya mencerminkan prefetch
+    if future is not None or st.session_state.prefetch_enabled:
+        record_prefetch_metric(misses=1)
+    return analyze_comparison_with_ai(data)
+
 def display_comparison_table():
     if not st.session_state.compare_list:
         return
@@ -401,13 +834,14 @@ def display_comparison_table():
     
     # Tombol Analisis AI
     if len(data) >= 2:
+        prefetch_comparison(data)
         if st.button("🧠 Minta AI Analisis Perbandingan", type="primary"):
             st.session_state.ai_compare_request = True
             st.rerun() 
         
         if st.session_state.get('ai_compare_request'):
             with st.spinner("AI sedang menganalisis perbedaan kunci..."):
-                ai_summary = analyze_comparison_with_ai(data)
+                ai_summary = get_comparison_insight(data)
                 st.markdown(f"**Insight AI:**")
                 st.info(ai_summary)
                 # Reset state setelah analisis selesai
@@ -426,8 +860,6 @@ def analyze_impact_with_ai(course_data, user_career_query):
     """
     try:
         if "GROQ_API_KEY" in st.secrets:
-            client = Groq(api_key=st.secrets["GROQ_API_KEY"])
-            
             summary = (
                 f"Mata Kuliah: {course_data['Course']} (Jurusan: {course_data['Program']}). "
                 f"Tingkat Kesulitan: {course_data['Difficulty']}/5. "
@@ -449,13 +881,7 @@ def analyze_impact_with_ai(course_data, user_career_query):
             Gunakan bahasa Indonesia yang menarik dan format list. Pastikan setiap judul poin menggunakan **bold**.
             """
             
-            completion = client.chat.completions.create(
-                model="llama-3.3-70b-versatile",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.6,
-                max_tokens=700,
-            )
-            return completion.choices[0].message.content
+            return run_ai_task("impact", [{"role": "user", "content": prompt}], temperature=0.6, max_tokens=700)
     except Exception as e:
         return f"Gagal mendapatkan simulasi dampak AI. Error: {str(e)}"
     return "Tidak ada Simulasi Dampak."
@@ -473,8 +899,6 @@ def analyze_curriculum_path(user_career_path, bookmarked_courses):
     """
     try:
         if "GROQ_API_KEY" in st.secrets:
-            client = Groq(api_key=st.secrets["GROQ_API_KEY"])
-            
             bookmarked_list = ", ".join([b['Course'] for b in bookmarked_courses])
             
             prompt = f"""
@@ -491,13 +915,7 @@ def analyze_curriculum_path(user_career_path, bookmarked_courses):
             Gunakan bahasa Indonesia yang gaul dan format list/poin. Pastikan setiap judul poin menggunakan **bold**.
             """
             
-            completion = client.chat.completions.create(
-                model="llama-3.3-70b-versatile",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.6,
-                max_tokens=800,
-            )
-            return completion.choices[0].message.content
+            return run_ai_task("path", [{"role": "user", "content": prompt}], temperature=0.6, max_tokens=800)
     except Exception as e:
         return f"Gagal mendapatkan analisis jalur AI. Error: {str(e)}"
     return "Tidak ada Analisis Jalur."
@@ -518,8 +936,13 @@ def page_recommendation():
         prog_list = ["Semua Jurusan"] + sorted(df['Program'].unique().tolist()) if not df.empty else []
         sel_prog = st.selectbox("Jurusan Spesifik:", prog_list)
         diff_range = st.slider("Filter Kesulitan (Bintang):", 1, 5, (1, 5))
+        rank_label = st.selectbox("Metode Peringkat:", list(RANKING_METHODS))
+        rank_method = RANKING_METHODS[rank_label]
+        rank_weights = BM25_FIELD_WEIGHTS if rank_method == "bm25" else None
     
-    user_input = st.text_area("Ceritakan minatmu:", height=100, placeholder="Contoh: Saya suka banget makan...")
+    if not df.empty:
+        render_autocomplete("Cari cepat nama matkul / jurusan:", 'search_interest', 'search_autocomplete', placeholder="Contoh: Prinsip Akun...")
+    user_input = st.text_area("Ceritakan minatmu:", key='search_interest', height=100, placeholder="Contoh: Saya suka banget makan...")
     
     if st.button("Analisis Minat 🚀"):
         if not user_input:
@@ -528,34 +951,35 @@ def page_recommendation():
             st.markdown("---")
             clean_text, ignored = process_negation(user_input)
             
-            df_filter = df.copy()
-            if sel_prog != "Semua Jurusan": 
-                df_filter = df_filter[df_filter['Program'] == sel_prog]
+            candidates = (df['Program'] == sel_prog).to_numpy() if sel_prog != "Semua Jurusan" else None
             
-            recs = get_recommendations(clean_text, df_filter, ignored)
+            recs = get_recommendations(clean_text, df, ignored, rank_method, rank_weights, candidates)
+            working_bytes = recs.attrs.get('working_bytes_estimate', 0)
             
             if recs.empty:
                 with st.spinner("Hmm, mencari hubungan minatmu dengan jurusan yang ada..."):
                     ai_keywords = get_keywords_via_ai(clean_text)
                     st.caption(f"🤖 AI mendeteksi minat terkait: *{ai_keywords}*")
-                    recs = get_recommendations(ai_keywords, df_filter, ignored)
+                    recs = get_recommendations(ai_keywords, df, ignored, rank_method, rank_weights, candidates)
+                    working_bytes = max(working_bytes, recs.attrs.get('working_bytes_estimate', 0))
+            if working_bytes:
+                st.caption(f"🧮 Perkiraan ukuran array kerja + hasil pencarian: {working_bytes / 1024:.1f} KB")
             
             if not recs.empty:
-                recs['Difficulty'] = recs['Course'].apply(get_course_difficulty)
                 recs = recs[(recs['Difficulty'] >= diff_range[0]) & (recs['Difficulty'] <= diff_range[1])]
                 
                 if not recs.empty:
                     st.success(f"✅ Ditemukan {len(recs)} Mata Kuliah yang pas!")
 
                     st.header("Visualisasi Kecocokan")
-                    create_interest_map(recs.to_dict('records')) 
+                    create_interest_map(recs)
                     st.markdown("---")
                     
                     st.header("Daftar Detail")
                     recs = recs.reset_index(drop=True)
                     for i, row in recs.iterrows():
                         stars = '★' * int(row['Difficulty']) + '☆' * (5 - int(row['Difficulty']))
-                        advice = get_course_advice(row['Course'])
+                        advice = row['Advice']
 
                         st.markdown(f"""
                         <div class="result-card">
@@ -599,27 +1023,15 @@ def page_chat_ai():
             full_response = ""
             try:
                 if "GROQ_API_KEY" in st.secrets:
-                    client = Groq(api_key=st.secrets["GROQ_API_KEY"])
-                    
                     messages_payload = [
                         {"role": "system", "content": "Kamu adalah Advisor Kampus UBM yang gaul, seru, dan suportif. Gunakan bahasa Indonesia santai dan emoji."}
                     ] + [
                         {"role": m["role"], "content": m["content"]} for m in st.session_state.messages
                     ]
                     
-                    completion = client.chat.completions.create(
-                        model="llama-3.3-70b-versatile",
-                        messages=messages_payload,
-                        temperature=0.7,
-                        max_tokens=1024,
-                        stream=True, 
-                    )
+                    completion = run_ai_task("chat", messages_payload, temperature=0.7, max_tokens=1024, stream=True)
                     
-                    for chunk in completion:
-                        if chunk.choices[0].delta.content:
-                            full_response += chunk.choices[0].delta.content
-                            message_placeholder.markdown(full_response + "▌")
-                    message_placeholder.markdown(full_response)
+                    full_response, _ = render_stream(message_placeholder, iter_completion_text(completion))
                 else:
                     full_response = "⚠️ API Key Groq belum dipasang."
                     message_placeholder.error(full_response)
@@ -665,20 +1077,28 @@ def page_bookmarks():
 
     # --- LOGIKA INPUT DAN OUTPUT FITUR #4 ---
     if st.session_state.path_query == "Requesting":
+        # saran disimpan terpisah dari input form: isi form baru ter-commit saat submit, jadi
+        # menulis ke state input-nya dari luar form akan menimpa ketikan yang belum dikirim
+        render_autocomplete("Cari cepat matkul / jurusan / minat:", 'path_suggestions', 'path_autocomplete', placeholder="Contoh: Desain...")
+        if st.session_state.path_suggestions:
+            st.caption(f"➕ Ditambahkan ke analisis: *{st.session_state.path_suggestions}*")
+            st.button("Hapus saran", on_click=lambda: st.session_state.update(path_suggestions=""))
         with st.form(key='path_form'):
-            career_path_query = st.text_input(
+            career_path_input = st.text_input(
                 "Tuliskan jalur karir spesifik yang kamu inginkan:", 
                 placeholder="Contoh: Menjadi UI/UX Designer di E-commerce"
             )
             path_submit = st.form_submit_button("Analisis Jalur 🔍")
+            career_path_query = f"{career_path_input.strip()} {st.session_state.path_suggestions}".strip()
             
             if path_submit and career_path_query:
                 with st.spinner(f"AI sedang menganalisis jalur untuk '{career_path_query}'..."):
                     analysis_result = analyze_curriculum_path(career_path_query, st.session_state.bookmarks)
                     st.session_state.path_analysis = analysis_result
                     st.session_state.path_query = "Done"
+                    st.session_state.path_suggestions = ""
                     st.rerun()
-        st.button("❌ Batal Analisis Jalur", on_click=lambda: st.session_state.update(path_query=None, path_analysis=None))
+        st.button("❌ Batal Analisis Jalur", on_click=lambda: st.session_state.update(path_query=None, path_analysis=None, path_suggestions=""))
     
     if st.session_state.path_analysis and st.session_state.path_query == "Done":
         st.subheader("📊 Hasil Analisis Jalur Belajar")
@@ -788,6 +1208,10 @@ def page_bookmarks():
 # 5. NAVIGASI UTAMA
 # ==========================================
 def main():
+    try:
+        get_search_bundle()  # muat artefak pencarian sekali per proses, sebelum halaman pertama dibuka
+    except FileNotFoundError:
+        pass  # CSV hilang: pesan error ditampilkan oleh load_data() di halaman pencarian
     if 'app_started' not in st.session_state:
         st.session_state['app_started'] = False
 
@@ -824,6 +1248,30 @@ def main():
             if st.button("🏠 Kembali ke Depan"):
                 st.session_state['app_started'] = False
                 st.rerun()
+            st.toggle("⚡ Prefetch Insight AI", key='prefetch_enabled', help="Mulai analisis perbandingan di background begitu ada 2+ matkul yang dibandingkan.")
+            with st.expander("📈 Statistik Performa"):
+                ai_stats = summarize_ai_metrics()
+                if ai_stats.empty:
+                    st.caption("Belum ada panggilan AI.")
+                else:
+                    st.caption("Latensi & keberhasilan per tugas AI")
+                    st.dataframe(ai_stats, hide_index=True, use_container_width=True)
+                with get_stream_metrics()["lock"]:
+                    streams = pd.DataFrame(list(get_stream_metrics()["streams"]))
+                if not streams.empty:
+                    st.caption(
+                        f"🌊 Streaming ({len(streams)} respons): rata-rata {streams['chunk_rate'].mean():.0f} chunk/s, "
+                        f"{streams['flushes'].mean():.1f} flush dari {streams['chunks'].mean():.0f} chunk, "
+                        f"render {streams['render_ms'].mean():.1f} ms"
+                    )
+                prefetch = get_prefetch_metrics()
+                if prefetch["started"]:
+                    hit_rate = 100 * prefetch["hits"] / max(prefetch["hits"] + prefetch["misses"], 1)
+                    st.caption(
+                        f"⚡ Prefetch: {prefetch['started']} dimulai, hit rate {hit_rate:.0f}% "
+                        f"({prefetch['hits']} hit / {prefetch['misses']} miss), "
+                        f"{prefetch['tokens']} token spekulatif, {prefetch['skipped']} dilewati (budget)"
+                    )
 
         menu = st.session_state.get('menu', "🔍 Cari Jurusan (Database)")
         if menu == "🔍 Cari Jurusan (Database)":
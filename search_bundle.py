@@ -0,0 +1,288 @@
+"""Artefak pencarian (katalog + indeks TF-IDF) yang dibangun offline dan disimpan di disk.
+
+Artefak ditulis sekali (`python search_bundle.py`, mis. saat deploy), lalu setiap proses
+Streamlit di host yang sama membukanya lewat memory-map read-only, jadi replika tidak perlu
+parse CSV dan fit vectorizer sendiri-sendiri. Yang benar-benar dibagi oleh OS antar proses:
+matriks CSR TF-IDF, idf, kolom numerik katalog dan kode kolom kategorikal (mis. `Program`).
+Kolom teks unik (mis. `Course`) disimpan ringkas sebagai UTF-8 + offset dan tetap di-decode
+menjadi string Python di tiap proses. Setiap artefak terikat ke checksum SHA-256 CSV
+sumbernya; kalau CSV berubah, artefak dianggap basi. Modul ini sengaja tidak mengimpor streamlit.
+"""
+import argparse
+import hashlib
+import io
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix
+
+DATA_CSV = 'List Mata Kuliah UBM.xlsx - Sheet1.csv'
+BUNDLE_ROOT = 'search_bundle'
+BUNDLE_VERSION = 3
+TOKEN_PATTERN = re.compile(r"(?u)\b\w\w+\b")  # sama dengan token_pattern bawaan TfidfVectorizer
+INDEX_ARRAYS = ['vocab', 'idf', 'data', 'indices', 'indptr']
+
+logger = logging.getLogger(__name__)
+
+
+def get_course_advice(course_name):
+    course_lower = course_name.lower()
+    if any(x in course_lower for x in ['matematika', 'statistik', 'akuntansi']):
+        return "💡 Tips: Pahami konsep dasar, jangan cuma hafal rumus. Latihan soal kuncinya!"
+    elif any(x in course_lower for x in ['coding', 'algoritma', 'data']):
+        return "💻 Tips: Praktek (ngoding) lebih efektif daripada baca teori. Jangan takut error!"
+    elif any(x in course_lower for x in ['desain', 'gambar', 'art']):
+        return "🎨 Tips: Perbanyak lihat referensi (Pinterest) dan bangun portofolio."
+    elif any(x in course_lower for x in ['bisnis', 'manajemen']):
+        return "📊 Tips: Pelajari studi kasus nyata perusahaan dan latih skill presentasi."
+    else:
+        return "📝 Tips: Catat poin penting dosen dan aktif bertanya di kelas."
+
+
+def get_course_difficulty(course_name):
+    name = (course_name or "").lower()
+    if any(k in name for k in ['matematika', 'kalkulus', 'statistika', 'fisika']): return 5
+    elif any(k in name for k in ['algoritma', 'program', 'akuntansi']): return 4
+    elif any(k in name for k in ['desain', 'bahasa', 'komunikasi']): return 2
+    return 3
+
+
+def source_checksum(csv_path=DATA_CSV):
+    with open(csv_path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def bundle_path(checksum, root=BUNDLE_ROOT):
+    return os.path.join(root, f"v{BUNDLE_VERSION}-{checksum[:16]}")
+
+
+def prepare_catalog(csv_path=DATA_CSV):
+    """Membaca CSV mata kuliah dan menyiapkan kolom turunan (`combined_features`, `Difficulty`, `Advice`)."""
+    df = pd.read_csv(csv_path)
+    df = df.dropna(subset=['Course']).reset_index(drop=True)
+    df['combined_features'] = df['Course'].astype(str) + ' ' + df['Program'].astype(str)
+    df['Difficulty'] = df['Course'].astype(str).apply(get_course_difficulty)
+    df['Advice'] = df['Course'].astype(str).apply(get_course_advice)
+    return df
+
+
+def encode_catalog(df):
+    """Mengubah kolom katalog menjadi array numpy yang bisa di-memory-map.
+
+    Kolom numerik disimpan apa adanya; kolom teks berulang (mis. `Program`, `Advice`) sebagai kode
+    integer + daftar kategori; kolom teks lain sebagai blob UTF-8 + offset int64.
+    Mengembalikan (arrays, spesifikasi kolom untuk meta.json).
+    """
+    arrays, columns = {}, []
+    for col in df.columns:
+        if col == 'combined_features':  # diturunkan lagi dari Course + Program saat dibaca
+            continue
+        values = df[col].to_numpy()
+        if np.issubdtype(values.dtype, np.number):
+            arrays[f'catalog_{col}'] = values
+            columns.append({'name': col, 'kind': 'numeric'})
+            continue
+        texts = df[col].astype(str)
+        if texts.nunique() * 2 <= len(texts):
+            codes, categories = pd.factorize(texts)
+            # dtype kode mengikuti pilihan pandas (int8/int16/...) supaya from_codes tidak perlu menyalin
+            arrays[f'catalog_{col}.codes'] = pd.Categorical.from_codes(codes, categories).codes
+            columns.append({'name': col, 'kind': 'categorical', 'categories': list(categories)})
+        else:
+            encoded = [t.encode('utf-8') for t in texts]
+            arrays[f'catalog_{col}.utf8'] = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+            arrays[f'catalog_{col}.offsets'] = np.concatenate([[0], np.cumsum([len(e) for e in encoded])]).astype(np.int64)
+            columns.append({'name': col, 'kind': 'utf8'})
+    return arrays, columns
+
+
+def build_artifacts(csv_path=DATA_CSV):
+    """Parse katalog dan fit TF-IDF atas seluruh katalog. Mengembalikan (arrays, meta) di memori."""
+    # diimpor di sini supaya startup app yang cukup membaca artefak tidak perlu memuat sklearn
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    with open(csv_path, 'rb') as f:
+        raw = f.read()
+    checksum = hashlib.sha256(raw).hexdigest()
+    df = prepare_catalog(io.BytesIO(raw))
+    vectorizer = TfidfVectorizer()
+    matrix = vectorizer.fit_transform(df['combined_features']).tocsr()
+    matrix.sort_indices()
+
+    arrays = {
+        'vocab': vectorizer.get_feature_names_out().astype(str),
+        'idf': vectorizer.idf_.astype(np.float64),
+        'data': matrix.data.astype(np.float64),
+        'indices': matrix.indices.astype(np.int32),
+        'indptr': matrix.indptr.astype(np.int32),
+    }
+    catalog_arrays, columns = encode_catalog(df)
+    arrays.update(catalog_arrays)
+    meta = {
+        'version': BUNDLE_VERSION,
+        'n_docs': int(matrix.shape[0]),
+        'n_terms': int(matrix.shape[1]),
+        'columns': columns,
+        'source_file': os.path.basename(csv_path),
+        'source_sha256': checksum,
+        'built_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+    }
+    return arrays, meta
+
+
+def build_bundle(csv_path=DATA_CSV, root=BUNDLE_ROOT, force=False):
+    """Membangun artefak dan menulisnya sebagai file .npy di bundle_path().
+
+    Artefak ditulis ke folder sementara lalu di-rename, jadi proses lain tidak pernah melihat
+    artefak setengah jadi; jika proses lain lebih dulu selesai, hasil milik kita dibuang.
+    Artefak versi/checksum lain di `root` dihapus setelahnya.
+    """
+    arrays, meta = build_artifacts(csv_path)
+    target = bundle_path(meta['source_sha256'], root)
+    os.makedirs(root, exist_ok=True)
+    if force:
+        shutil.rmtree(target, ignore_errors=True)
+    tmp_dir = tempfile.mkdtemp(prefix='.build-', dir=root)
+    try:
+        for name, values in arrays.items():
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), np.ascontiguousarray(values))
+        with open(os.path.join(tmp_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        os.rename(tmp_dir, target)
+    except OSError:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        if not os.path.exists(os.path.join(target, 'meta.json')):
+            raise
+    for name in os.listdir(root):
+        if name.startswith('v') and name != os.path.basename(target):
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+    return target
+
+
+def load_bundle(csv_path=DATA_CSV, root=BUNDLE_ROOT):
+    """Membuka artefak via memory-map read-only.
+
+    Mengembalikan None jika artefak untuk isi CSV saat ini belum ada (hilang atau basi).
+    """
+    checksum = source_checksum(csv_path)
+    path = bundle_path(checksum, root)
+    meta_file = os.path.join(path, 'meta.json')
+    if not os.path.exists(meta_file):
+        return None
+    with open(meta_file, 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    if meta.get('version') != BUNDLE_VERSION or meta.get('source_sha256') != checksum:
+        return None
+
+    names = INDEX_ARRAYS + catalog_array_names(meta['columns'])
+    arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r') for name in names}
+    return assemble_bundle(arrays, meta, path)
+
+
+def assemble_bundle(arrays, meta, path=None):
+    """Menyusun dict bundle dari array (memory-map atau di memori); `path` None berarti tidak di disk."""
+    bundle = {name: arrays[name] for name in INDEX_ARRAYS}
+    bundle['meta'] = meta
+    bundle['path'] = path
+    bundle['catalog'] = {name: arrays[name] for name in catalog_array_names(meta['columns'])}
+    # copy=False: data/indices/indptr tetap menunjuk ke array asal (halaman memory-map bersama bila dari disk)
+    bundle['matrix'] = csr_matrix(
+        (bundle['data'], bundle['indices'], bundle['indptr']),
+        shape=(meta['n_docs'], meta['n_terms']),
+        copy=False,
+    )
+    return bundle
+
+
+def open_bundle(csv_path=DATA_CSV, root=BUNDLE_ROOT):
+    """Membuka artefak; membangunnya dulu bila belum ada atau sudah basi.
+
+    Jika artefak tidak bisa ditulis (folder read-only, path bukan folder, dll.), indeks dibangun
+    di memori proses ini saja. FileNotFoundError hanya diteruskan bila CSV sumbernya yang hilang.
+    """
+    bundle = load_bundle(csv_path, root)
+    if bundle is not None:
+        return bundle
+    try:
+        build_bundle(csv_path, root)
+        bundle = load_bundle(csv_path, root)
+    except OSError as e:
+        if not os.path.exists(csv_path):
+            raise
+        logger.warning("Artefak pencarian tidak bisa ditulis ke '%s' (%s); indeks dibangun di memori.", root, e)
+    if bundle is None:
+        bundle = assemble_bundle(*build_artifacts(csv_path))
+    return bundle
+
+
+def catalog_array_names(columns):
+    suffixes = {'numeric': [''], 'categorical': ['.codes'], 'utf8': ['.utf8', '.offsets']}
+    return [f"catalog_{c['name']}{suffix}" for c in columns for suffix in suffixes[c['kind']]]
+
+
+def catalog_frame(bundle):
+    """DataFrame katalog dari bundle (urutan baris = urutan baris matriks TF-IDF).
+
+    Kolom numerik dan kode kategorikal tetap menunjuk ke array memory-map (copy=False);
+    kolom UTF-8 di-decode menjadi string per proses. `combined_features` diturunkan di sini.
+    """
+    arrays, data = bundle['catalog'], {}
+    for c in bundle['meta']['columns']:
+        name, prefix = c['name'], f"catalog_{c['name']}"
+        if c['kind'] == 'numeric':
+            data[name] = pd.Series(arrays[prefix], copy=False)
+        elif c['kind'] == 'categorical':
+            data[name] = pd.Series(pd.Categorical.from_codes(arrays[f'{prefix}.codes'], c['categories']), copy=False)
+        else:
+            blob, offsets = arrays[f'{prefix}.utf8'], arrays[f'{prefix}.offsets']
+            data[name] = pd.Series([bytes(blob[a:b]).decode('utf-8') for a, b in zip(offsets[:-1], offsets[1:])])
+    df = pd.DataFrame(data, copy=False)
+    df['combined_features'] = df['Course'].astype(str) + ' ' + df['Program'].astype(str)
+    return df
+
+
+def tfidf_scores(bundle, query):
+    """Cosine similarity query terhadap setiap baris katalog.
+
+    Sama dengan TfidfVectorizer.transform + cosine_similarity, tapi hanya memakai vocab/idf/matriks
+    dari bundle: baris matriks sudah ternormalisasi L2, jadi cukup satu perkalian matriks-vektor.
+    """
+    vocab, idf = bundle['vocab'], bundle['idf']
+    scores = np.zeros(bundle['meta']['n_docs'])
+    terms = np.array(TOKEN_PATTERN.findall(query.lower()), dtype=str)
+    if terms.size == 0 or vocab.size == 0:
+        return scores
+    cols = np.searchsorted(vocab, terms).clip(max=vocab.size - 1)
+    cols, counts = np.unique(cols[vocab[cols] == terms], return_counts=True)
+    if cols.size == 0:
+        return scores
+    weights = counts * idf[cols]
+    query_vec = np.zeros(bundle['meta']['n_terms'])
+    query_vec[cols] = weights / np.linalg.norm(weights)
+    return bundle['matrix'] @ query_vec
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bangun artefak pencarian (katalog + indeks TF-IDF) secara offline.")
+    parser.add_argument('--csv', default=DATA_CSV, help="CSV sumber katalog mata kuliah.")
+    parser.add_argument('--out', default=BUNDLE_ROOT, help="Folder tujuan artefak.")
+    parser.add_argument('--force', action='store_true', help="Bangun ulang walaupun artefak masih valid.")
+    args = parser.parse_args(argv)
+
+    bundle = None if args.force else load_bundle(args.csv, args.out)
+    if bundle is not None:
+        print(f"Artefak masih valid: {bundle['path']}")
+        return
+    path = build_bundle(args.csv, args.out, force=args.force)
+    print(f"Artefak dibangun: {path}")
+
+
+if __name__ == "__main__":
+    main()